@@ -50,6 +50,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
+    # Does nothing unless FINMAN_PROFILING['ENABLED'] is set (see below)
+    'finman.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'finman.urls'
@@ -89,6 +91,35 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered analytics charts, one entry per user/month. Local memory evicts the
+    # least recently used entry once MAX_ENTRIES is reached; swap in
+    # django.core.cache.backends.filebased.FileBasedCache to share it between workers.
+    'charts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'finman-charts',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# Serve the small HTMX partials (tracker/async_views.py) with async views. Only worth
+# it under an ASGI server, see finman/settings_asgi.py.
+FINMAN_ASYNC_VIEWS = False
+
+# Analytics chart engine: 'svg' (no extra dependencies) or 'plotly' (interactive,
+# loads pandas and plotly into the worker on first use)
+FINMAN_CHART_ENGINE = 'svg'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,4 +167,25 @@ LOGIN_REDIRECT_URL = '/'  # Redirect to home page after login
 LOGOUT_REDIRECT_URL = '/' # Redirect to home page after logout
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Per-request profiling (finman/profiling.py). When enabled, sampled responses get a
+# Server-Timing header and a JSON line on the 'finman.profiling' logger. Sending the
+# X-Finman-Profile header dumps a cProfile file into PROFILE_DIR (DEBUG or staff only).
+FINMAN_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,
+    'ALLOW_PROFILE': DEBUG,
+    'PROFILE_DIR': BASE_DIR / 'profiles',
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'finman.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
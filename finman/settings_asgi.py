@@ -0,0 +1,18 @@
+"""
+Settings for running finman under an ASGI server.
+
+    pip install uvicorn
+    DJANGO_SETTINGS_MODULE=finman.settings_asgi uvicorn finman.asgi:application --workers 4
+
+Compare with WSGI using: python manage.py loadtest --help
+"""
+
+from .settings import *  # noqa: F401,F403
+
+# Route the HTMX partial endpoints to tracker/async_views.py
+FINMAN_ASYNC_VIEWS = True
+
+# Persistent connections are per thread and async views don't stay on one thread,
+# so let each request close its connection (Django recommends this under ASGI).
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = 0
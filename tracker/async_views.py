@@ -0,0 +1,76 @@
+# tracker/async_views.py
+# Async versions of the small HTMX partial endpoints. Under ASGI they run on the event
+# loop instead of each holding a worker thread. tracker/urls.py routes to them when
+# FINMAN_ASYNC_VIEWS is on (see finman/settings_asgi.py).
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import render
+from django_htmx.http import trigger_client_event
+from datetime import datetime
+from .budgets import abudget_status
+from .models import Expense
+from .pagination import akeyset_page
+from . import rollups
+
+
+async def _aget_expense(user, pk):
+    # Async stand-in for get_object_or_404
+    try:
+        return await Expense.objects.select_related('category').aget(pk=pk, user=user)
+    except Expense.DoesNotExist:
+        raise Http404("No expense matches the given query.")
+
+
+@login_required
+async def expense_page(request):
+    user = await request.auser()
+    expenses, next_cursor = await akeyset_page(
+        Expense.objects.filter(user=user).select_related('category'),
+        cursor=request.GET.get('cursor'),
+    )
+    return render(request, 'tracker/partials/expense_page.html', {
+        'expenses': expenses,
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+async def get_expense_row(request, pk):
+    expense = await _aget_expense(await request.auser(), pk)
+    return render(request, 'tracker/partials/expense_row.html', {'expense': expense})
+
+
+@sync_to_async
+def _delete_with_rollup(expense):
+    # Transactions are tied to a thread, so this part runs in one
+    with transaction.atomic():
+        expense.delete()
+        rollups.remove_expense(expense)
+
+
+@login_required
+async def delete_expense(request, pk):
+    expense = await _aget_expense(await request.auser(), pk)
+    if request.method == 'DELETE':
+        await _delete_with_rollup(expense)
+        return trigger_client_event(HttpResponse(''), 'expenseSaved')
+    return HttpResponse('') # Return an empty response
+
+
+@login_required
+async def budget_status_partial(request):
+    today = datetime.now()
+    try:
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+        datetime(year, month, 1)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid month.")
+    statuses = await abudget_status(await request.auser(), year, month)
+    return render(request, 'tracker/partials/budget_status.html', {
+        'statuses': statuses,
+        'year': year,
+        'month': month,
+    })
@@ -0,0 +1,235 @@
+# tracker/benchmarks.py
+# Shared by the bench_endpoints command and the query-count tests
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .models import Category, Expense, Income, Budget
+from . import charts, rollups
+
+
+def seed_user(username, expenses, incomes=None, categories=12, days=3 * 365):
+    # A synthetic user with `expenses` expenses spread over the last `days` days
+    random.seed(f'{username}-{expenses}')
+    user = User.objects.create_user(username, password='benchmark')
+    category_objs = Category.objects.bulk_create(
+        [Category(user=user, name=f'Category {i}') for i in range(categories)]
+    )
+    today = date.today()
+
+    def random_day():
+        return today - timedelta(days=random.randrange(days))
+
+    # Every category gets spending this month so the write paths always update existing rollup rows
+    this_month = [
+        Expense(user=user, category=category, date=today.replace(day=1), amount=10, description='Seed')
+        for category in category_objs
+    ]
+    Expense.objects.bulk_create(
+        (Expense(user=user, category=random.choice(category_objs), date=random_day(),
+                 amount=Decimal(random.randrange(100, 50000)) / 100, description=f'Expense {i}')
+         for i in range(max(expenses - categories, 0))),
+        batch_size=1000,
+    )
+    Expense.objects.bulk_create(this_month)
+    Income.objects.bulk_create(
+        (Income(user=user, source=random.choice(['Salary', 'Freelance', 'Interest']), date=random_day(),
+                amount=Decimal(random.randrange(1000, 500000)) / 100)
+         for i in range(incomes if incomes is not None else expenses // 10)),
+        batch_size=1000,
+    )
+    Budget.objects.bulk_create(
+        Budget(user=user, category=category, amount=500, year=today.year, month=today.month)
+        for category in category_objs
+    )
+    rollups.rebuild(user_ids=[user.id])
+    return user
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    url_name: str
+    htmx: bool = False
+    # Called before every request with (user, client), returns (url kwargs, query string or body)
+    prepare: object = None
+    # Upper bound on queries, the same at every scale
+    max_queries: int = None
+
+
+def _some_expense(user):
+    return Expense.objects.filter(user=user).only('id').first()
+
+
+def _new_expense(user):
+    # Each delete needs a row of its own
+    category = Category.objects.filter(user=user).first()
+    return Expense.objects.create(user=user, category=category, amount=1, date=date.today())
+
+
+def _next_page(user, client):
+    html = client.get(reverse('dashboard')).content.decode()
+    cursor = html.split('cursor=', 1)[1].split('"', 1)[0] if 'cursor=' in html else ''
+    return {}, {'cursor': cursor}
+
+
+def _expense_form(user, client):
+    category = Category.objects.filter(user=user).first()
+    return {}, {'date': date.today().isoformat(), 'category': category.id, 'amount': '12.34',
+                'description': 'Benchmark'}
+
+
+def _expense_put(user, client):
+    expense = _some_expense(user)
+    category = Category.objects.filter(user=user).last()
+    body = f'date={date.today().isoformat()}&category={category.id}&amount=9.99&description=Edited'
+    return {'pk': expense.id}, body
+
+
+def _budget_post(user, client):
+    category = Category.objects.filter(user=user).first()
+    return {}, {'category_id': category.id, 'amount': '250'}
+
+
+def _all_budgets(user, client):
+    ids = Category.objects.filter(user=user).values_list('id', flat=True)
+    return {}, {f'amount_{category_id}': '300' for category_id in ids}
+
+
+def _month(user, client):
+    today = date.today()
+    return {}, {'year': today.year, 'month': today.month}
+
+
+def _cold_month(user, client):
+    charts.clear_charts()
+    return _month(user, client)
+
+
+ROUTES = [
+    Route('home', 'GET', 'home', max_queries=2),
+    Route('signup', 'GET', 'signup', max_queries=2),
+    Route('login', 'GET', 'login', max_queries=2),
+    Route('profile', 'GET', 'profile', max_queries=3),
+    Route('dashboard', 'GET', 'dashboard', max_queries=5),
+    Route('expense_page', 'GET', 'expense_page', htmx=True, prepare=_next_page, max_queries=3),
+    Route('add_expense', 'POST', 'add_expense', htmx=True, prepare=_expense_form, max_queries=6),
+    Route('edit_expense_form', 'GET', 'edit_expense', htmx=True,
+          prepare=lambda user, client: ({'pk': _some_expense(user).id}, None), max_queries=5),
+    Route('edit_expense', 'PUT', 'edit_expense', htmx=True, prepare=_expense_put, max_queries=8),
+    Route('get_expense_row', 'GET', 'get_expense_row', htmx=True,
+          prepare=lambda user, client: ({'pk': _some_expense(user).id}, None), max_queries=3),
+    Route('delete_expense', 'DELETE', 'delete_expense', htmx=True,
+          prepare=lambda user, client: ({'pk': _new_expense(user).id}, None), max_queries=5),
+    Route('analytics', 'GET', 'analytics', prepare=_cold_month, max_queries=3),
+    Route('analytics_htmx_cold', 'GET', 'analytics', htmx=True, prepare=_cold_month, max_queries=3),
+    Route('analytics_htmx_cached', 'GET', 'analytics', htmx=True, prepare=_month, max_queries=2),
+    Route('trends_12m', 'GET', 'trends', htmx=True, prepare=lambda user, client: ({}, {'range': '12m'}),
+          max_queries=3),
+    Route('trends_36m', 'GET', 'trends', htmx=True, prepare=lambda user, client: ({}, {'range': '36m'}),
+          max_queries=3),
+    Route('income_list', 'GET', 'income_list', max_queries=3),
+    Route('income_post', 'POST', 'income_list', htmx=True,
+          prepare=lambda user, client: ({}, {'date': date.today().isoformat(), 'source': 'Salary',
+                                             'amount': '100', 'description': ''}),
+          max_queries=4),
+    Route('manage_budgets', 'GET', 'manage_budgets', max_queries=3),
+    Route('budget_status', 'GET', 'budget_status', htmx=True, max_queries=3),
+    Route('manage_budgets_post', 'POST', 'manage_budgets', htmx=True, prepare=_budget_post, max_queries=5),
+    Route('save_all_budgets', 'POST', 'save_all_budgets', htmx=True, prepare=_all_budgets, max_queries=4),
+    Route('copy_budgets', 'POST', 'copy_budgets', htmx=True, max_queries=3),
+    Route('export_expenses', 'GET', 'export_expenses', max_queries=3),
+    Route('export_incomes', 'GET', 'export_incomes', max_queries=3),
+    Route('import_expenses', 'GET', 'import_expenses', max_queries=2),
+]
+
+
+def _request(client, route, user):
+    kwargs, payload = route.prepare(user, client) if route.prepare else ({}, None)
+    url = reverse(route.url_name, kwargs=kwargs)
+    headers = {'HX-Request': 'true'} if route.htmx else {}
+    method = getattr(client, route.method.lower())
+    if route.method in ('PUT', 'DELETE'):
+        return lambda: method(url, payload or '', content_type='application/x-www-form-urlencoded',
+                              headers=headers)
+    return lambda: method(url, payload, headers=headers)
+
+
+def _count_queries(captured):
+    # Savepoints come and go with the surrounding transaction, they aren't work the view does
+    return sum(1 for query in captured.captured_queries if 'SAVEPOINT' not in query['sql'])
+
+
+def _consume(response):
+    # Streaming responses only hit the database while they are read
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def run_routes(user, repeat=5, routes=ROUTES):
+    # Returns {route name: {'status', 'queries', 'median_ms', 'max_ms', 'peak_kb'}}
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for route in routes:
+        timings, queries, peaks, status = [], [], [], None
+        for _ in range(repeat):
+            send = _request(client, route, user)
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = _consume(send())
+                timings.append((time.perf_counter() - start) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+            queries.append(_count_queries(captured))
+            status = response.status_code
+        results[route.name] = {
+            'status': status,
+            'queries': max(queries),
+            'median_ms': round(statistics.median(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'peak_kb': round(max(peaks), 1),
+        }
+    return results
+
+
+def check_thresholds(results, routes=ROUTES):
+    # Returns a list of human-readable problems, empty if everything is within bounds
+    problems = []
+    for route in routes:
+        result = results.get(route.name)
+        if result is None:
+            continue
+        if result['status'] >= 400:
+            problems.append(f"{route.name}: HTTP {result['status']}")
+        if route.max_queries is not None and result['queries'] > route.max_queries:
+            problems.append(f"{route.name}: {result['queries']} queries (limit {route.max_queries})")
+    return problems
+
+
+def compare_to_baseline(results, baseline, time_tolerance=0.5, noise_ms=10):
+    # Flags routes that gained queries or got more than time_tolerance slower than the baseline.
+    # Slowdowns smaller than noise_ms are ignored, fast routes jitter too much to judge.
+    problems = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            problems.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+        slowdown = result['median_ms'] - before['median_ms']
+        if slowdown > noise_ms and result['median_ms'] > before['median_ms'] * (1 + time_tolerance):
+            problems.append(f"{name}: {before['median_ms']} -> {result['median_ms']} ms")
+    return problems
@@ -0,0 +1,92 @@
+# tracker/budgets.py
+from dataclasses import dataclass
+from decimal import Decimal
+from django.db import connection
+from django.db.models import DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Budget, Category, MonthlyCategoryTotal
+
+
+@dataclass
+class BudgetStatus:
+    category: Category
+    budget: Decimal # None when no budget is set for the month
+    spent: Decimal
+
+    @property
+    def remaining(self):
+        if self.budget is None:
+            return None
+        return self.budget - self.spent
+
+    @property
+    def percent_used(self):
+        if not self.budget:
+            return None
+        return round(self.spent / self.budget * 100, 1)
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.spent > self.budget
+
+
+def _status_queryset(user, year, month):
+    # Budget against spending for every category of the user, in a single query:
+    # the month's budget and rolled-up total are pulled in as subqueries.
+    period = dict(user=user, year=year, month=month, category=OuterRef('pk'))
+    budget = Budget.objects.filter(**period).values('amount')[:1]
+    spent = MonthlyCategoryTotal.objects.filter(**period).values('total')[:1]
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    return Category.objects.filter(user=user).annotate(
+        budget_amount=Subquery(budget, output_field=money),
+        spent_total=Coalesce(Subquery(spent), Value(Decimal('0')), output_field=money),
+    ).order_by('name')
+
+
+def _to_status(category):
+    return BudgetStatus(category=category, budget=category.budget_amount, spent=category.spent_total)
+
+
+def budget_status(user, year, month):
+    return [_to_status(category) for category in _status_queryset(user, year, month)]
+
+
+async def abudget_status(user, year, month):
+    return [_to_status(category) async for category in _status_queryset(user, year, month)]
+
+
+def save_budgets(user, year, month, amounts):
+    # amounts maps category id -> amount. Inserts or updates them all in one statement
+    # using the (user, category, month, year) unique key.
+    budgets = [
+        Budget(user=user, category_id=category_id, amount=amount, year=year, month=month)
+        for category_id, amount in amounts.items()
+    ]
+    Budget.objects.bulk_create(
+        budgets,
+        update_conflicts=True,
+        unique_fields=['user', 'category', 'month', 'year'],
+        update_fields=['amount'],
+    )
+    return len(budgets)
+
+
+def previous_month(year, month):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def copy_budgets_forward(user, year, month):
+    # Copies last month's budgets into (year, month) as a single INSERT ... SELECT.
+    # Categories that already have a budget this month are left alone.
+    from_year, from_month = previous_month(year, month)
+    table = connection.ops.quote_name(Budget._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, category_id, amount, month, year) '
+            f'SELECT user_id, category_id, amount, %s, %s FROM {table} '
+            f'WHERE user_id = %s AND year = %s AND month = %s '
+            f'ON CONFLICT (user_id, category_id, month, year) DO NOTHING',
+            [month, year, user.id, from_year, from_month],
+        )
+        return cursor.rowcount
@@ -0,0 +1,207 @@
+# tracker/charts.py
+import math
+from datetime import datetime
+from django.core.cache import caches
+from django.conf import settings
+from django.utils.html import escape
+
+# Alias of the cache (see CACHES in settings) that holds rendered charts
+CHART_CACHE = getattr(settings, 'FINMAN_CHART_CACHE', 'charts')
+
+# 'svg' draws the chart here from the aggregated rows with no extra dependencies.
+# 'plotly' keeps the old interactive chart; pandas and plotly are only imported when it is used.
+CHART_ENGINE = getattr(settings, 'FINMAN_CHART_ENGINE', 'svg')
+
+# Plotly's default qualitative colours, so both engines look alike
+PALETTE = [
+    '#636efa', '#EF553B', '#00cc96', '#ab63fa', '#FFA15A',
+    '#19d3f3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52',
+]
+
+EMPTY_CHART = "<div class='text-center p-5'><p>No expense data for this period.</p></div>"
+
+
+def chart_cache_key(user_id, year, month):
+    return f'chart:{CHART_ENGINE}:{user_id}:{year}:{month}'
+
+
+def get_cached_chart(user_id, year, month):
+    return caches[CHART_CACHE].get(chart_cache_key(user_id, year, month))
+
+
+def cache_chart(user_id, year, month, chart_html):
+    # The timeout and size bound come from the cache's own TIMEOUT / MAX_ENTRIES options
+    caches[CHART_CACHE].set(chart_cache_key(user_id, year, month), chart_html)
+
+
+def invalidate_charts(user_id, months):
+    # months is an iterable of (year, month) pairs whose data changed
+    caches[CHART_CACHE].delete_many([chart_cache_key(user_id, year, month) for year, month in months])
+
+
+def clear_charts():
+    caches[CHART_CACHE].clear()
+
+
+def render_chart(category_totals, year, month, engine=None):
+    # category_totals is a list of {'category__name': ..., 'total': ...} rows, largest first
+    rows = [row for row in category_totals if row['total'] > 0]
+    if not rows:
+        # Provide a placeholder message if there's no data
+        return EMPTY_CHART
+
+    title = f'Expenses for {datetime(year, month, 1).strftime("%B %Y")}'
+    engine = engine or CHART_ENGINE
+    if engine == 'plotly':
+        return render_plotly(rows, title)
+    return render_svg(rows, title)
+
+
+def _point(cx, cy, r, angle):
+    return cx + r * math.cos(angle), cy + r * math.sin(angle)
+
+
+def render_svg(rows, title):
+    # A static pie chart with a legend, built straight from the totals
+    cx, cy, r = 150, 170, 120
+    grand_total = sum(row['total'] for row in rows)
+    height = max(310, 60 + len(rows) * 22) # Grow to fit long legends
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 600 {height}" width="100%" height="400" '
+        f'role="img" aria-label="{escape(title)}">',
+        f'<text x="20" y="24" font-size="17">{escape(title)}</text>',
+    ]
+
+    angle = -math.pi / 2 # Start at 12 o'clock like Plotly does
+    for i, row in enumerate(rows):
+        share = float(row['total'] / grand_total)
+        colour = PALETTE[i % len(PALETTE)]
+        name = escape(row['category__name'])
+        label = f'{name}: ${row["total"]} ({share:.1%})'
+
+        if share >= 0.9999:
+            # A single category is a full circle, which an arc path can't draw
+            parts.append(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{colour}"><title>{label}</title></circle>')
+        else:
+            end = angle + share * 2 * math.pi
+            x1, y1 = _point(cx, cy, r, angle)
+            x2, y2 = _point(cx, cy, r, end)
+            large_arc = 1 if share > 0.5 else 0
+            parts.append(
+                f'<path d="M{cx},{cy} L{x1:.2f},{y1:.2f} A{r},{r} 0 {large_arc} 1 {x2:.2f},{y2:.2f} Z" '
+                f'fill="{colour}" stroke="#fff"><title>{label}</title></path>'
+            )
+            angle = end
+
+        # Legend entry
+        y = 60 + i * 22
+        parts.append(f'<rect x="320" y="{y - 11}" width="12" height="12" fill="{colour}"/>')
+        parts.append(f'<text x="340" y="{y}" font-size="13">{label}</text>')
+
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def render_plotly(rows, title):
+    # Imported here so workers using the SVG engine never load pandas or plotly
+    import pandas as pd
+    import plotly.express as px
+
+    # Convert the rows to a Pandas DataFrame
+    df = pd.DataFrame(rows)
+
+    # Rename columns for clarity in the chart
+    df.rename(columns={'category__name': 'Category', 'total': 'Amount'}, inplace=True)
+
+    # Create the Plotly Express pie chart
+    fig = px.pie(
+        df,
+        names='Category',
+        values='Amount',
+        title=title,
+        height=400
+    )
+
+    # Update layout for better appearance
+    fig.update_layout(
+        margin=dict(l=20, r=20, t=40, b=20),
+        legend_title_text='Categories'
+    )
+
+    # Convert the figure to HTML
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+
+
+# (key in the trends data, legend label, colour) for the trend chart lines
+TREND_LINES = [
+    ('income', 'Income', '#00cc96'),
+    ('expenses', 'Expenses', '#EF553B'),
+    ('net', 'Net cash flow', '#636efa'),
+    ('net_rolling', 'Net, rolling average', '#ab63fa'),
+]
+
+
+def render_trend_chart(trends, title, engine=None):
+    # trends is the output of tracker.trends.build_trends
+    if not any(trends['income']) and not any(trends['expenses']):
+        return "<div class='text-center p-5'><p>No data for this period.</p></div>"
+    engine = engine or CHART_ENGINE
+    if engine == 'plotly':
+        return render_trend_plotly(trends, title)
+    return render_trend_svg(trends, title)
+
+
+def render_trend_svg(trends, title):
+    width, height = 720, 320
+    left, right, top, bottom = 70, 20, 40, 60
+    months = trends['months']
+    values = [value for key, _, _ in TREND_LINES for value in trends[key]]
+    low, high = min(values + [0]), max(values + [0])
+    if low == high:
+        high = low + 1
+
+    def x(i):
+        step = (width - left - right) / max(len(months) - 1, 1)
+        return left + i * step
+
+    def y(value):
+        return top + (high - value) / (high - low) * (height - top - bottom)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height + 30}" width="100%" '
+        f'role="img" aria-label="{escape(title)}">',
+        f'<text x="20" y="24" font-size="17">{escape(title)}</text>',
+        # Zero line and axis labels
+        f'<line x1="{left}" x2="{width - right}" y1="{y(0):.1f}" y2="{y(0):.1f}" stroke="#999" stroke-dasharray="4"/>',
+        f'<text x="{left - 6}" y="{y(high) + 4:.1f}" font-size="11" text-anchor="end">${high:,.0f}</text>',
+        f'<text x="{left - 6}" y="{y(low) + 4:.1f}" font-size="11" text-anchor="end">${low:,.0f}</text>',
+    ]
+
+    # Label roughly a dozen months at most
+    label_every = max(1, len(months) // 12)
+    for i, month in enumerate(months):
+        if i % label_every == 0:
+            parts.append(
+                f'<text x="{x(i):.1f}" y="{height - bottom + 18}" font-size="11" '
+                f'text-anchor="middle">{month.strftime("%b %y")}</text>'
+            )
+
+    for n, (key, label, colour) in enumerate(TREND_LINES):
+        points = ' '.join(f'{x(i):.1f},{y(value):.1f}' for i, value in enumerate(trends[key]))
+        parts.append(f'<polyline points="{points}" fill="none" stroke="{colour}" stroke-width="2"><title>{label}</title></polyline>')
+        legend_x = left + n * 160
+        parts.append(f'<rect x="{legend_x}" y="{height}" width="12" height="12" fill="{colour}"/>')
+        parts.append(f'<text x="{legend_x + 18}" y="{height + 11}" font-size="12">{label}</text>')
+
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def render_trend_plotly(trends, title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for key, label, colour in TREND_LINES:
+        fig.add_trace(go.Scatter(x=trends['months'], y=trends[key], name=label, line=dict(color=colour)))
+    fig.update_layout(title=title, height=400, margin=dict(l=20, r=20, t=40, b=20))
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
@@ -0,0 +1,77 @@
+# tracker/exports.py
+import csv
+import json
+from .models import Expense, Income
+
+# Rows are pulled from the database this many at a time (a server-side cursor on Postgres)
+CHUNK_SIZE = 2000
+
+# (column name, ORM lookup) pairs for each export
+EXPENSE_COLUMNS = [
+    ('date', 'date'),
+    ('category', 'category__name'),
+    ('amount', 'amount'),
+    ('description', 'description'),
+]
+INCOME_COLUMNS = [
+    ('date', 'date'),
+    ('source', 'source'),
+    ('amount', 'amount'),
+    ('description', 'description'),
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _filter_dates(queryset, start=None, end=None):
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+    return queryset
+
+
+def expense_rows(user, start=None, end=None, category=None):
+    expenses = _filter_dates(Expense.objects.filter(user=user), start, end)
+    if category:
+        expenses = expenses.filter(category=category)
+    lookups = [lookup for _, lookup in EXPENSE_COLUMNS]
+    return expenses.order_by('date', 'id').values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+
+
+def income_rows(user, start=None, end=None, source=None):
+    incomes = _filter_dates(Income.objects.filter(user=user), start, end)
+    if source:
+        incomes = incomes.filter(source=source)
+    lookups = [lookup for _, lookup in INCOME_COLUMNS]
+    return incomes.order_by('date', 'id').values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    # csv.writer wants a file; this one just hands each line back
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(columns, rows):
+    names = [name for name, _ in columns]
+    for row in rows:
+        # Dates and decimals go out as strings so nothing is lost to float rounding
+        record = {name: (value if value is None else str(value)) for name, value in zip(names, row)}
+        yield json.dumps(record) + '\n'
+
+
+def iter_export(fmt, columns, rows):
+    if fmt == 'jsonl':
+        return iter_jsonl(columns, rows)
+    return iter_csv(columns, rows)
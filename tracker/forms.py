@@ -23,4 +23,64 @@ class IncomeForm(forms.ModelForm):
         fields = ['date', 'source', 'amount', 'description']
         widgets = {
             'date': forms.DateInput(attrs={'type': 'date'}),
-        }
\ No newline at end of file
+        }
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], required=False)
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean_format(self):
+        return self.cleaned_data['format'] or 'csv'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and start > end:
+            raise forms.ValidationError('The start date must be before the end date.')
+        return cleaned_data
+
+class ExpenseExportForm(ExportForm):
+    category = forms.ModelChoiceField(queryset=Category.objects.none(), required=False)
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        if user:
+            self.fields['category'].queryset = Category.objects.filter(user=user)
+
+class IncomeExportForm(ExportForm):
+    source = forms.CharField(max_length=100, required=False)
+
+class ImportForm(forms.Form):
+    file = forms.FileField(help_text='A CSV with date, amount, category and description columns, or an OFX/QFX statement.')
+    format = forms.ChoiceField(
+        choices=[('auto', 'Detect from file name'), ('csv', 'CSV'), ('ofx', 'OFX / QFX')],
+        initial='auto',
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get('file')
+        if upload and cleaned_data.get('format') == 'auto':
+            is_ofx = upload.name.lower().endswith(('.ofx', '.qfx'))
+            cleaned_data['format'] = 'ofx' if is_ofx else 'csv'
+        return cleaned_data
+
+class BulkBudgetForm(forms.Form):
+    # One optional amount field per category, named amount_<category id>
+    def __init__(self, *args, **kwargs):
+        self.categories = kwargs.pop('categories')
+        super().__init__(*args, **kwargs)
+        for category in self.categories:
+            self.fields[f'amount_{category.id}'] = forms.DecimalField(
+                label=category.name, required=False, min_value=0, max_digits=10, decimal_places=2,
+            )
+
+    def amounts(self):
+        # Category id -> amount for every field that was filled in
+        return {
+            category.id: self.cleaned_data[f'amount_{category.id}']
+            for category in self.categories
+            if self.cleaned_data.get(f'amount_{category.id}') is not None
+        }
@@ -0,0 +1,191 @@
+# tracker/importers.py
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.db import transaction
+from .models import Category, Expense
+from . import rollups
+
+# Rows validated and written per round trip
+CHUNK_SIZE = 1000
+
+# Category used when the statement doesn't say (OFX never does)
+DEFAULT_CATEGORY = 'Uncategorized'
+
+DATE_FORMATS = ['%d/%m/%Y', '%m/%d/%Y', '%Y%m%d']
+
+# Largest amount that fits Expense.amount (max_digits=10, decimal_places=2)
+MAX_AMOUNT = Decimal('99999999.99')
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    duplicates: int = 0
+    errors: list = field(default_factory=list) # (line number, message) pairs
+
+    @property
+    def error_count(self):
+        return len(self.errors)
+
+
+def _text(fileobj):
+    # Uploaded files are binary; decode lazily instead of reading the whole thing
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding='utf-8-sig', errors='replace', newline='')
+
+
+def parse_csv(fileobj):
+    # Yields (line number, raw row) pairs. Needs 'date' and 'amount' columns,
+    # 'category' and 'description' are optional.
+    reader = csv.DictReader(_text(fileobj))
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, {
+            'date': row.get('date'),
+            'amount': row.get('amount'),
+            'category': row.get('category'),
+            'description': row.get('description'),
+        }
+
+
+OFX_TAG = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def parse_ofx(fileobj):
+    # A minimal streaming reader for the <STMTTRN> blocks of an OFX/QFX statement.
+    # Works for both the SGML (unclosed tags) and XML flavours.
+    transaction_data = None
+    for line_num, line in enumerate(_text(fileobj), start=1):
+        for tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                transaction_data = {'line': line_num}
+            elif transaction_data is not None:
+                transaction_data[tag] = value.strip()
+        if transaction_data is not None and '</STMTTRN>' in line.upper():
+            amount = transaction_data.get('TRNAMT', '').lstrip('+')
+            yield transaction_data['line'], {
+                'date': transaction_data.get('DTPOSTED', '')[:8],
+                # Statements record spending as negative amounts, flip the sign
+                'amount': amount[1:] if amount.startswith('-') else f'-{amount}',
+                'category': None,
+                'description': transaction_data.get('MEMO') or transaction_data.get('NAME'),
+            }
+            transaction_data = None
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    try:
+        # Far quicker than strptime and what most exports use
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date '{value}'.")
+
+
+def _parse_amount(value):
+    value = (value or '').strip()
+    try:
+        amount = Decimal(value.replace(',', '').lstrip('$')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount '{value}'.")
+    if amount < 0:
+        raise ValueError('Negative amounts (refunds and credits) are not expenses.')
+    if amount > MAX_AMOUNT:
+        raise ValueError(f"Amount '{value}' is too large.")
+    return amount
+
+
+def validate_row(raw):
+    # Returns (date, amount, category name, description) or raises ValueError
+    category = (raw.get('category') or '').strip()[:100] or DEFAULT_CATEGORY
+    description = (raw.get('description') or '').strip()
+    return _parse_date(raw.get('date')), _parse_amount(raw.get('amount')), category, description
+
+
+def _resolve_categories(user, names, category_ids):
+    # Maps category names to ids, creating the missing ones in one go
+    missing = names - category_ids.keys()
+    if not missing:
+        return
+    Category.objects.bulk_create(
+        [Category(user=user, name=name) for name in missing],
+        ignore_conflicts=True,
+    )
+    category_ids.update(
+        Category.objects.filter(user=user, name__in=missing).values_list('name', 'id')
+    )
+
+
+def _load_existing_keys(user, rows, loaded_dates, existing):
+    # Adds the (date, amount, description) of the user's expenses on the chunk's dates
+    # to existing. Each date is only fetched once per import.
+    dates = {row[0] for row in rows} - loaded_dates
+    if not dates:
+        return
+    loaded_dates |= dates
+    matches = Expense.objects.filter(user=user, date__in=dates).values_list('date', 'amount', 'description')
+    existing.update((day, amount, description or '') for day, amount, description in matches)
+
+
+def import_expenses(user, parsed_rows, chunk_size=CHUNK_SIZE):
+    # parsed_rows is the output of parse_csv / parse_ofx. Everything is written in one
+    # transaction, so a failure part way leaves the ledger untouched.
+    result = ImportResult()
+    category_ids = dict(Category.objects.filter(user=user).values_list('name', 'id'))
+    existing = set() # Keys already in the ledger or earlier in this file
+    loaded_dates = set()
+    months = set()
+
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(parsed_rows, chunk_size))
+            if not chunk:
+                break
+
+            valid = []
+            for line_num, raw in chunk:
+                try:
+                    valid.append(validate_row(raw))
+                except ValueError as error:
+                    result.errors.append((line_num, str(error)))
+            if not valid:
+                continue
+
+            _resolve_categories(user, {row[2] for row in valid}, category_ids)
+            _load_existing_keys(user, valid, loaded_dates, existing)
+
+            new_expenses = []
+            for day, amount, category, description in valid:
+                key = (day, amount, description)
+                if key in existing:
+                    result.duplicates += 1
+                    continue
+                existing.add(key)
+                months.add((day.year, day.month))
+                new_expenses.append(Expense(
+                    user=user,
+                    category_id=category_ids[category],
+                    amount=amount,
+                    date=day,
+                    description=description,
+                ))
+            Expense.objects.bulk_create(new_expenses, batch_size=chunk_size)
+            result.created += len(new_expenses)
+
+        rollups.refresh_months(user.id, months)
+    return result
@@ -0,0 +1,80 @@
+# tracker/management/commands/bench_charts.py
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from tracker import charts
+
+ENGINES = ['svg', 'plotly']
+
+
+def sample_totals(categories):
+    return [
+        {'category__name': f'Category {i}', 'total': Decimal(1000 - i * 37) + Decimal('0.25')}
+        for i in range(categories)
+    ]
+
+
+def max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Compares import time, worker memory and render latency of the chart engines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engine', choices=ENGINES, action='append',
+                            help='Engine to measure (default: all).')
+        parser.add_argument('--renders', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--child', action='store_true', help=('Internal: measure a single engine '
+                                                                    'in this process.'))
+
+    def handle(self, *args, **options):
+        if options['child']:
+            result = self.measure(options['engine'][0], options['renders'], options['categories'])
+            self.stdout.write(json.dumps(result))
+            return
+
+        # Every engine runs in a fresh interpreter so imports and memory don't leak between them
+        results = []
+        for engine in options['engine'] or ENGINES:
+            output = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_charts', '--child', '--engine', engine,
+                 '--renders', str(options['renders']), '--categories', str(options['categories'])],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure(self, engine, renders, categories):
+        rows = sample_totals(categories)
+        rss_before = max_rss_mb()
+
+        # The first render pays for any lazy imports, like the first request a worker serves
+        start = time.perf_counter()
+        html = charts.render_chart(rows, 2025, 1, engine=engine)
+        first_render_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for _ in range(renders):
+            start = time.perf_counter()
+            charts.render_chart(rows, 2025, 1, engine=engine)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        return {
+            'engine': engine,
+            'rss_before_mb': round(rss_before, 1),
+            'rss_after_mb': round(max_rss_mb(), 1),
+            'first_render_ms': round(first_render_ms, 2),
+            'median_render_ms': round(statistics.median(timings), 3),
+            'p95_render_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+            'html_bytes': len(html),
+            'modules_loaded': len(sys.modules),
+        }
@@ -0,0 +1,63 @@
+# tracker/management/commands/bench_endpoints.py
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+from tracker import benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Drives every tracker and users route through the test client at several ledger sizes and '
+            'records query counts, wall time and peak memory as JSON. All seeded data is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, action='append', dest='scales',
+                            help='Expenses per synthetic user (repeatable, default: 1000 10000).')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per route.')
+        parser.add_argument('--route', action='append', dest='routes', help='Only run these routes.')
+        parser.add_argument('--output', '-o', help='Write the JSON results to this file.')
+        parser.add_argument('--baseline', help='Fail if results regress against this earlier output.')
+        parser.add_argument('--time-tolerance', type=float, default=0.5,
+                            help='Allowed slowdown against the baseline (0.5 = 50%%).')
+
+    def handle(self, *args, **options):
+        routes = benchmarks.ROUTES
+        if options['routes']:
+            routes = [route for route in routes if route.name in options['routes']]
+
+        # Lets the test client through ALLOWED_HOSTS and keeps emails in memory
+        setup_test_environment()
+        results = {}
+        try:
+            for scale in options['scales'] or [1000, 10000]:
+                with transaction.atomic():
+                    user = benchmarks.seed_user(f'bench-{scale}', expenses=scale)
+                    results[str(scale)] = benchmarks.run_routes(user, options['repeat'], routes)
+                    transaction.set_rollback(True)
+                self.stderr.write(f'Measured {len(routes)} routes at {scale} expenses')
+        finally:
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        problems = []
+        for scale, scale_results in results.items():
+            problems += [f'[{scale}] {problem}' for problem in benchmarks.check_thresholds(scale_results, routes)]
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            for scale, scale_results in results.items():
+                if scale in baseline:
+                    problems += [
+                        f'[{scale}] {problem}' for problem in
+                        benchmarks.compare_to_baseline(scale_results, baseline[scale], options['time_tolerance'])
+                    ]
+
+        if problems:
+            raise CommandError('Benchmark regressions:\n' + '\n'.join(problems))
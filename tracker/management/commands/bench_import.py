@@ -0,0 +1,68 @@
+# tracker/management/commands/bench_import.py
+import csv
+import io
+import random
+import time
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tracker import importers
+from tracker.models import Expense
+
+
+def make_csv(rows, categories):
+    # A synthetic statement spread over the last three years
+    random.seed(rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['date', 'amount', 'category', 'description'])
+    start = date.today() - timedelta(days=3 * 365)
+    for i in range(rows):
+        writer.writerow([
+            (start + timedelta(days=random.randrange(3 * 365))).isoformat(),
+            f'{random.uniform(1, 500):.2f}',
+            f'Category {random.randrange(categories)}',
+            f'Transaction {i}',
+        ])
+    return buffer.getvalue().encode()
+
+
+class Command(BaseCommand):
+    help = 'Measures bulk CSV import throughput. Everything is rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--categories', type=int, default=25)
+        parser.add_argument('--chunk-size', type=int, default=importers.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        statement = make_csv(options['rows'], options['categories'])
+        self.stdout.write(f"Generated {options['rows']} rows ({len(statement) / 1e6:.1f} MB)")
+
+        with transaction.atomic():
+            user = User.objects.create_user('bench-import-user')
+
+            start = time.perf_counter()
+            result = importers.import_expenses(
+                user, importers.parse_csv(io.BytesIO(statement)), chunk_size=options['chunk_size']
+            )
+            elapsed = time.perf_counter() - start
+            self.report('first import', result, elapsed, options['rows'])
+
+            # Importing the same file again exercises the duplicate check on a full ledger
+            start = time.perf_counter()
+            result = importers.import_expenses(
+                user, importers.parse_csv(io.BytesIO(statement)), chunk_size=options['chunk_size']
+            )
+            elapsed = time.perf_counter() - start
+            self.report('re-import', result, elapsed, options['rows'])
+
+            self.stdout.write(f'Expenses stored: {Expense.objects.filter(user=user).count()}')
+            transaction.set_rollback(True)
+
+    def report(self, label, result, elapsed, rows):
+        self.stdout.write(
+            f'{label}: {result.created} created, {result.duplicates} duplicates, '
+            f'{result.error_count} errors in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)'
+        )
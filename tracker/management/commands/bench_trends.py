@@ -0,0 +1,48 @@
+# tracker/management/commands/bench_trends.py
+import statistics
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from tracker import benchmarks, trends
+
+
+class Command(BaseCommand):
+    help = 'Measures trend latency and query count as the range grows. Seeded data is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expenses', type=int, default=50_000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--months', type=int, action='append',
+                            help='Range lengths to measure (default: 3 12 36 120).')
+
+    def handle(self, *args, **options):
+        import pandas # noqa: F401 - loaded up front so the first range doesn't pay for it
+
+        with transaction.atomic():
+            # Ten years of history so even the longest range is full
+            user = benchmarks.seed_user('bench-trends', options['expenses'],
+                                        categories=options['categories'], days=3650)
+            today = date.today()
+            self.stdout.write(f"{'months':>6} {'queries':>8} {'fetch ms':>9} {'vectorise ms':>13} {'total ms':>9}")
+            for months in options['months'] or [3, 12, 36, 120]:
+                fetch, build = [], []
+                for _ in range(options['repeat']):
+                    trends.RANGES['bench'] = ('Benchmark', months)
+                    start, end = trends.trend_window('bench', today)
+                    with CaptureQueriesContext(connection) as captured:
+                        began = time.perf_counter()
+                        rows = trends.monthly_rows(user, start, end)
+                        fetched = time.perf_counter()
+                    trends.build_trends(rows, start, end)
+                    built = time.perf_counter()
+                    fetch.append((fetched - began) * 1000)
+                    build.append((built - fetched) * 1000)
+                fetch_ms, build_ms = statistics.median(fetch), statistics.median(build)
+                self.stdout.write(
+                    f'{months:>6} {len(captured):>8} {fetch_ms:>9.1f} {build_ms:>13.1f} {fetch_ms + build_ms:>9.1f}'
+                )
+            trends.RANGES.pop('bench', None)
+            transaction.set_rollback(True)
@@ -0,0 +1,47 @@
+# tracker/management/commands/export_ledger.py
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tracker import exports
+from tracker.models import Category
+
+
+class Command(BaseCommand):
+    help = "Dumps a user's expenses or incomes as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('kind', choices=['expenses', 'incomes'])
+        parser.add_argument('--format', choices=list(exports.CONTENT_TYPES), default='csv')
+        parser.add_argument('--start', type=date.fromisoformat, help='First date to include (YYYY-MM-DD).')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date to include (YYYY-MM-DD).')
+        parser.add_argument('--category', help='Only expenses in this category (by name).')
+        parser.add_argument('--source', help='Only incomes from this source.')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+
+        if options['kind'] == 'expenses':
+            category = None
+            if options['category']:
+                category = Category.objects.filter(user=user, name=options['category']).first()
+                if category is None:
+                    raise CommandError(f"Category '{options['category']}' does not exist.")
+            columns = exports.EXPENSE_COLUMNS
+            rows = exports.expense_rows(user, options['start'], options['end'], category)
+        else:
+            columns = exports.INCOME_COLUMNS
+            rows = exports.income_rows(user, options['start'], options['end'], options['source'])
+
+        chunks = exports.iter_export(options['format'], columns, rows)
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', newline='') as output:
+            output.writelines(chunks)
@@ -0,0 +1,98 @@
+# tracker/management/commands/loadtest.py
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from tracker.models import Expense
+
+# The HTMX partials that have async versions; {expense} is replaced with one of the user's expenses
+DEFAULT_PATHS = [
+    '/tracker/get_expense_row/{expense}/',
+    '/tracker/expenses/more/',
+    '/tracker/budgets/status/',
+]
+
+
+class Command(BaseCommand):
+    help = ('Hammers a running server with concurrent HTMX requests and reports requests/sec and '
+            'latency percentiles. Run it once against a WSGI server and once against ASGI '
+            '(finman.settings_asgi) to compare them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='e.g. http://127.0.0.1:8000')
+        parser.add_argument('--user', required=True, help='Username to log the requests in as.')
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable).')
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--label', default='', help='Name for this run in the output.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+        expense = Expense.objects.filter(user=user).values_list('id', flat=True).first()
+        if expense is None:
+            raise CommandError('The user needs at least one expense.')
+
+        paths = [path.format(expense=expense) for path in options['paths'] or DEFAULT_PATHS]
+        headers = {
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={self.login(user)}',
+            'HX-Request': 'true',
+        }
+        url = urlsplit(options['base_url'])
+
+        local = threading.local()
+
+        def fetch(i):
+            # One keep-alive connection per client thread
+            if not hasattr(local, 'conn'):
+                local.conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            start = time.perf_counter()
+            try:
+                local.conn.request('GET', paths[i % len(paths)], headers=headers)
+                response = local.conn.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                local.conn.close()
+                del local.conn
+                ok = False
+            return time.perf_counter() - start, ok
+
+        # Warm up the server (imports, connections) before measuring
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            list(pool.map(fetch, range(options['concurrency'] * 2)))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(fetch, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency * 1000 for latency, _ in results)
+        self.stdout.write(json.dumps({
+            'label': options['label'],
+            'concurrency': options['concurrency'],
+            'requests': len(results),
+            'errors': sum(1 for _, ok in results if not ok),
+            'requests_per_sec': round(len(results) / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies), 1),
+            'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1], 1),
+        }))
+
+    def login(self, user):
+        # A real session row, as if the user had logged in through the site
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session.session_key
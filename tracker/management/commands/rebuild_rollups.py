@@ -0,0 +1,20 @@
+# tracker/management/commands/rebuild_rollups.py
+from django.core.management.base import BaseCommand
+from tracker import rollups
+from tracker.models import MonthlyCategoryTotal
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly category totals from the raw expenses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild this user id (can be repeated).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rollups.rebuild(user_ids=options['user_ids'], batch_size=options['batch_size'])
+        rows = MonthlyCategoryTotal.objects.all()
+        if options['user_ids']:
+            rows = rows.filter(user_id__in=options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows.count()} monthly totals.'))
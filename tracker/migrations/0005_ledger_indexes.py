@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_monthlycategorytotal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['user', 'year', 'month'], name='budget_user_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-date', '-id'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', '-date', '-id'], name='income_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlycategorytotal',
+            index=models.Index(fields=['user', 'year', 'month'], name='monthlytotal_user_period_idx'),
+        ),
+    ]
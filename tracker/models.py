@@ -24,6 +24,10 @@ class Expense(models.Model):
     class Meta:
         # Order expenses by date by default, newest first
         ordering = ['-date']
+        indexes = [
+            # Every ledger query is "this user's rows, newest first", paged on (date, id)
+            models.Index(fields=['user', '-date', '-id'], name='expense_user_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.description[:20]} - {self.amount}'
@@ -37,6 +41,9 @@ class Income(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', '-date', '-id'], name='income_user_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.source} - {self.amount}'
@@ -52,6 +59,28 @@ class Budget(models.Model):
     class Meta:
         # A user can only have one budget per category per month/year
         unique_together = ('user', 'category', 'month', 'year')
+        indexes = [
+            # The budgets page reads a whole month for one user
+            models.Index(fields=['user', 'year', 'month'], name='budget_user_period_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.user.username} - {self.category.name} - {self.month}/{self.year}'
\ No newline at end of file
+        return f'{self.user.username} - {self.category.name} - {self.month}/{self.year}'
+
+class MonthlyCategoryTotal(models.Model):
+    # Pre-summed spending per user/category/month, maintained by tracker.rollups
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_totals')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='monthly_totals')
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0) # Number of expenses behind the total
+
+    class Meta:
+        unique_together = ('user', 'category', 'year', 'month')
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='monthlytotal_user_period_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.category_id} - {self.month}/{self.year}: {self.total}'
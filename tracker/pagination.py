@@ -0,0 +1,52 @@
+# tracker/pagination.py
+from datetime import date
+from django.db.models import Q
+
+# Rows per page for the ledger tables
+PAGE_SIZE = 50
+
+
+def encode_cursor(obj):
+    # A cursor is just the (date, id) of the last row on the page, e.g. "2025-10-09.1234"
+    return f'{obj.date.isoformat()}.{obj.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        day, pk = cursor.split('.')
+        return date.fromisoformat(day), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_queryset(queryset, cursor=None, page_size=PAGE_SIZE):
+    # Instead of OFFSET we seek past the last (date, id) seen, so every page
+    # costs the same no matter how deep into the ledger the user scrolls.
+    queryset = queryset.order_by('-date', '-id')
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        last_date, last_id = position
+        queryset = queryset.filter(Q(date__lt=last_date) | Q(date=last_date, id__lt=last_id))
+
+    # One extra row tells us whether there is another page
+    return queryset[:page_size + 1]
+
+
+def _split_page(rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=PAGE_SIZE):
+    # Returns (rows, next_cursor) for a queryset ordered newest first
+    return _split_page(list(keyset_queryset(queryset, cursor, page_size)), page_size)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=PAGE_SIZE):
+    # Same as keyset_page, for async views
+    rows = [row async for row in keyset_queryset(queryset, cursor, page_size)]
+    return _split_page(rows, page_size)
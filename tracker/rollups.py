@@ -0,0 +1,116 @@
+# tracker/rollups.py
+from datetime import date
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from .models import Expense, MonthlyCategoryTotal
+from . import charts
+
+
+def month_bounds(year, month):
+    # [first day of the month, first day of the next month) - a range the date index can use
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def snapshot(expense):
+    # Copy the fields the rollup depends on before a form mutates the instance
+    return Expense(
+        user_id=expense.user_id,
+        category_id=expense.category_id,
+        amount=expense.amount,
+        date=expense.date,
+    )
+
+
+def _invalidate_charts(user_id, months):
+    # Cached charts are built from these totals, drop them once the change is committed
+    transaction.on_commit(lambda: charts.invalidate_charts(user_id, months))
+
+
+def apply_delta(user_id, category_id, year, month, amount, count):
+    _invalidate_charts(user_id, [(year, month)])
+    lookup = dict(user_id=user_id, category_id=category_id, year=year, month=month)
+    updated = MonthlyCategoryTotal.objects.filter(**lookup).update(
+        total=F('total') + amount,
+        count=F('count') + count,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            MonthlyCategoryTotal.objects.create(total=amount, count=count, **lookup)
+    except IntegrityError:
+        # Someone else created the row in the meantime, add to theirs
+        MonthlyCategoryTotal.objects.filter(**lookup).update(
+            total=F('total') + amount,
+            count=F('count') + count,
+        )
+
+
+def add_expense(expense):
+    apply_delta(expense.user_id, expense.category_id, expense.date.year, expense.date.month, expense.amount, 1)
+
+
+def remove_expense(expense):
+    apply_delta(expense.user_id, expense.category_id, expense.date.year, expense.date.month, -expense.amount, -1)
+
+
+def change_expense(old, new):
+    # Nothing to do if none of the rolled-up fields changed
+    if (old.category_id, old.date, old.amount) == (new.category_id, new.date, new.amount):
+        return
+    remove_expense(old)
+    add_expense(new)
+
+
+def _grouped_totals(expenses):
+    return (
+        expenses
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values('user_id', 'category_id', 'year', 'month')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+
+
+def _create_from(rows, batch_size):
+    MonthlyCategoryTotal.objects.bulk_create(
+        (MonthlyCategoryTotal(**row) for row in rows),
+        batch_size=batch_size,
+    )
+
+
+def refresh_months(user_id, months, batch_size=1000):
+    # Recompute the given (year, month) pairs for one user straight from the expenses.
+    # Used by the bulk write paths, where per-row deltas would cost a query each.
+    months = set(months)
+    if not months:
+        return
+    in_months = Q()
+    date_ranges = Q()
+    for year, month in months:
+        in_months |= Q(year=year, month=month)
+        start, end = month_bounds(year, month)
+        date_ranges |= Q(date__gte=start, date__lt=end)
+
+    with transaction.atomic():
+        MonthlyCategoryTotal.objects.filter(in_months, user_id=user_id).delete()
+        rows = _grouped_totals(Expense.objects.filter(date_ranges, user_id=user_id))
+        _create_from(rows, batch_size)
+        _invalidate_charts(user_id, months)
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    # Throw the rollup away and build it again from scratch
+    totals = MonthlyCategoryTotal.objects.all()
+    expenses = Expense.objects.all()
+    if user_ids is not None:
+        totals = totals.filter(user_id__in=user_ids)
+        expenses = expenses.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        totals.delete()
+        _create_from(_grouped_totals(expenses).iterator(chunk_size=batch_size), batch_size)
+        transaction.on_commit(charts.clear_charts)
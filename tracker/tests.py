@@ -1,3 +1,139 @@
-from django.test import TestCase
+# tracker/tests.py
+import random
+from asgiref.sync import sync_to_async
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from .models import Category, Expense, Income, Budget, MonthlyCategoryTotal
+from .pagination import keyset_page, keyset_queryset
+from . import async_views, benchmarks, rollups, views
 
-# Create your tests here.
+
+class QueryPlanTests(TestCase):
+    # Seeds enough rows across several users that the planner prefers an index
+    # over a full scan, then checks the hot queries actually use ours.
+    USERS = 20
+    ROWS_PER_USER = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        random.seed(7)
+        start = date(2022, 1, 1)
+        expenses, incomes, budgets = [], [], []
+        for i in range(cls.USERS):
+            user = User.objects.create(username=f'plan-user-{i}')
+            categories = Category.objects.bulk_create(
+                [Category(user=user, name=f'Category {n}') for n in range(5)]
+            )
+            for n in range(cls.ROWS_PER_USER):
+                day = start + timedelta(days=random.randrange(1000))
+                expenses.append(Expense(user=user, category=random.choice(categories),
+                                        amount=Decimal(random.randrange(1, 10000)) / 100, date=day))
+                incomes.append(Income(user=user, source='Salary', amount=Decimal(1000), date=day))
+            for year in (2022, 2023, 2024):
+                for month in range(1, 13):
+                    budgets.extend(Budget(user=user, category=category, amount=100, year=year, month=month)
+                                   for category in categories)
+        Expense.objects.bulk_create(expenses, batch_size=500)
+        Income.objects.bulk_create(incomes, batch_size=500)
+        Budget.objects.bulk_create(budgets, batch_size=500)
+        rollups.rebuild()
+        cls.user = user
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'Expected {index_name} in plan:\n{plan}')
+
+    def test_expense_first_page(self):
+        queryset = keyset_queryset(Expense.objects.filter(user=self.user))
+        self.assertUsesIndex(queryset, 'expense_user_date_idx')
+
+    def test_expense_page_after_cursor(self):
+        _, cursor = keyset_page(Expense.objects.filter(user=self.user))
+        queryset = keyset_queryset(Expense.objects.filter(user=self.user), cursor)
+        self.assertUsesIndex(queryset, 'expense_user_date_idx')
+
+    def test_expense_date_range(self):
+        start, end = rollups.month_bounds(2023, 6)
+        queryset = Expense.objects.filter(user=self.user, date__gte=start, date__lt=end)
+        self.assertUsesIndex(queryset, 'expense_user_date_idx')
+
+    def test_income_first_page(self):
+        queryset = keyset_queryset(Income.objects.filter(user=self.user))
+        self.assertUsesIndex(queryset, 'income_user_date_idx')
+
+    def test_budget_month(self):
+        queryset = Budget.objects.filter(user=self.user, year=2023, month=6)
+        self.assertUsesIndex(queryset, 'budget_user_period_idx')
+
+    def test_monthly_totals_month(self):
+        queryset = MonthlyCategoryTotal.objects.filter(user=self.user, year=2023, month=6)
+        self.assertUsesIndex(queryset, 'monthlytotal_user_period_idx')
+
+
+class EndpointBenchmarkTests(TestCase):
+    # Runs every route at two ledger sizes. Query counts must stay within each
+    # route's limit and must not grow with the ledger (which would mean an N+1).
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = benchmarks.seed_user('bench-small', expenses=60)
+        cls.large = benchmarks.seed_user('bench-large', expenses=600)
+
+    def test_query_counts(self):
+        small = benchmarks.run_routes(self.small, repeat=1)
+        large = benchmarks.run_routes(self.large, repeat=1)
+        self.assertEqual(benchmarks.check_thresholds(small), [])
+        self.assertEqual(benchmarks.check_thresholds(large), [])
+        for name, result in large.items():
+            self.assertEqual(result['queries'], small[name]['queries'], name)
+
+
+class AsyncViewTests(TestCase):
+    # The async partials (served under ASGI) must render exactly what the sync ones do
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = benchmarks.seed_user('async-user', expenses=120)
+
+    def request(self, factory, path, method='get', **params):
+        request = getattr(factory, method)(path, params)
+        request.user = self.user
+
+        async def auser():
+            return self.user
+        request.auser = auser
+        return request
+
+    async def assertSameResponse(self, name, path, *args, method='get', **params):
+        sync_response = await sync_to_async(getattr(views, name))(
+            self.request(RequestFactory(), path, method, **params), *args)
+        async_response = await getattr(async_views, name)(
+            self.request(AsyncRequestFactory(), path, method, **params), *args)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+
+    async def test_partials_match_sync_views(self):
+        _, cursor = await sync_to_async(keyset_page)(Expense.objects.filter(user=self.user))
+        expense = await Expense.objects.filter(user=self.user).afirst()
+        await self.assertSameResponse('expense_page', '/', cursor=cursor)
+        await self.assertSameResponse('get_expense_row', '/', expense.pk)
+        await self.assertSameResponse('budget_status_partial', '/')
+
+    async def test_delete_updates_rollup(self):
+        expense = await Expense.objects.filter(user=self.user).afirst()
+        period = dict(user=self.user, category_id=expense.category_id,
+                      year=expense.date.year, month=expense.date.month)
+        before = await MonthlyCategoryTotal.objects.aget(**period)
+        response = await async_views.delete_expense(
+            self.request(AsyncRequestFactory(), '/', 'delete'), expense.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await Expense.objects.filter(pk=expense.pk).aexists())
+        after = await MonthlyCategoryTotal.objects.aget(**period)
+        self.assertEqual(after.count, before.count - 1)
+        self.assertEqual(after.total, before.total - expense.amount)
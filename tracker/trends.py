@@ -0,0 +1,104 @@
+# tracker/trends.py
+from datetime import date
+from django.db.models import CharField, F, Q, Sum, Value
+from django.db.models.functions import ExtractMonth, ExtractYear
+from .models import Income, MonthlyCategoryTotal
+
+# Choices for the trend range selector: key -> (label, months back or None for year to date)
+RANGES = {
+    '12m': ('Last 12 months', 12),
+    '36m': ('Last 36 months', 36),
+    'ytd': ('Year to date', None),
+}
+DEFAULT_RANGE = '12m'
+
+# Months in the rolling average
+ROLLING_WINDOW = 3
+
+INCOME = 'income'
+EXPENSE = 'expense'
+
+
+def trend_window(range_key, today=None):
+    # First day of the first month and first day of the month after the last one
+    today = today or date.today()
+    _, months = RANGES.get(range_key, RANGES[DEFAULT_RANGE])
+    if months is None:
+        start = date(today.year, 1, 1)
+    else:
+        index = today.year * 12 + today.month - months # zero-based month count
+        start = date(index // 12, index % 12 + 1, 1)
+    end = date(today.year + 1, 1, 1) if today.month == 12 else date(today.year, today.month + 1, 1)
+    return start, end
+
+
+def _month_range(start, end):
+    # (year, month) between start and end as a filter on integer year/month columns
+    last = date(end.year - 1, 12, 1) if end.month == 1 else date(end.year, end.month - 1, 1)
+    after_start = Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month)
+    before_end = Q(year__lt=last.year) | Q(year=last.year, month__lte=last.month)
+    return after_start & before_end
+
+
+def monthly_rows(user, start, end):
+    # Monthly expense totals per category and monthly income, as one UNION query.
+    # Expenses come from the pre-summed rollup, so the cost follows the number of
+    # months and categories rather than the number of expenses.
+    text = CharField()
+    expenses = (
+        MonthlyCategoryTotal.objects.filter(_month_range(start, end), user=user, count__gt=0)
+        .annotate(kind=Value(EXPENSE, output_field=text), label=F('category__name'), amount=F('total'))
+        .values('kind', 'year', 'month', 'label', 'amount')
+    )
+    incomes = (
+        Income.objects.filter(user=user, date__gte=start, date__lt=end)
+        .annotate(kind=Value(INCOME, output_field=text), year=ExtractYear('date'),
+                  month=ExtractMonth('date'), label=Value('Income', output_field=text))
+        .values('kind', 'year', 'month', 'label')
+        .annotate(amount=Sum('amount'))
+        .order_by()
+    )
+    return list(expenses.order_by().union(incomes, all=True))
+
+
+def build_trends(rows, start, end):
+    # Gap-fills the grouped rows into a dense month x category grid and derives the
+    # series from it with vectorised pandas operations (no per-month loop).
+    import pandas as pd
+
+    months = pd.date_range(start, end, freq='MS', inclusive='left')
+    frame = pd.DataFrame(rows, columns=['kind', 'year', 'month', 'label', 'amount'])
+    frame['period'] = pd.to_datetime(dict(year=frame['year'], month=frame['month'], day=1))
+    frame['total'] = frame['amount'].astype(float)
+
+    by_category = (
+        frame[frame['kind'] == EXPENSE]
+        .pivot_table(index='period', columns='label', values='total', aggfunc='sum')
+        .reindex(months, fill_value=0.0)
+        .fillna(0.0)
+    )
+    income = (
+        frame[frame['kind'] == INCOME]
+        .groupby('period')['total'].sum()
+        .reindex(months, fill_value=0.0)
+    )
+    expenses = by_category.sum(axis=1)
+    net = income - expenses
+
+    # Largest categories first
+    by_category = by_category[by_category.sum().sort_values(ascending=False).index]
+
+    return {
+        'months': [month.date() for month in months],
+        'income': income.round(2).tolist(),
+        'expenses': expenses.round(2).tolist(),
+        'net': net.round(2).tolist(),
+        'net_rolling': net.rolling(ROLLING_WINDOW, min_periods=1).mean().round(2).tolist(),
+        'expenses_rolling': expenses.rolling(ROLLING_WINDOW, min_periods=1).mean().round(2).tolist(),
+        'categories': {name: series.round(2).tolist() for name, series in by_category.items()},
+    }
+
+
+def trends_for(user, range_key, today=None):
+    start, end = trend_window(range_key, today)
+    return build_trends(monthly_rows(user, start, end), start, end)
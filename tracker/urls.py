@@ -1,14 +1,29 @@
 # tracker/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI the HTMX partials are served by their async versions
+if getattr(settings, 'FINMAN_ASYNC_VIEWS', False):
+    from . import async_views as partials
+else:
+    partials = views
+
 urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('expenses/more/', partials.expense_page, name='expense_page'),
     path('add_expense/', views.add_expense, name='add_expense'),
     path('edit_expense/<int:pk>/', views.edit_expense, name='edit_expense'),
-    path('delete_expense/<int:pk>/', views.delete_expense, name='delete_expense'),
-    path('get_expense_row/<int:pk>/', views.get_expense_row, name='get_expense_row'),
+    path('delete_expense/<int:pk>/', partials.delete_expense, name='delete_expense'),
+    path('get_expense_row/<int:pk>/', partials.get_expense_row, name='get_expense_row'),
     path('analytics/', views.analytics_view, name='analytics'),
+    path('analytics/trends/', views.trends_view, name='trends'),
     path('income/', views.income_list, name='income_list'),
     path('budgets/', views.manage_budgets, name='manage_budgets'),
+    path('budgets/status/', partials.budget_status_partial, name='budget_status'),
+    path('budgets/save/', views.save_all_budgets, name='save_all_budgets'),
+    path('budgets/copy_forward/', views.copy_budgets, name='copy_budgets'),
+    path('import/', views.import_expenses, name='import_expenses'),
+    path('export/expenses/', views.export_expenses, name='export_expenses'),
+    path('export/incomes/', views.export_incomes, name='export_incomes'),
 ]
\ No newline at end of file
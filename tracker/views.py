@@ -1,22 +1,45 @@
 # tracker/views.py
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from .forms import ExpenseForm, IncomeForm
+from .forms import ExpenseForm, IncomeForm, ExpenseExportForm, IncomeExportForm, ImportForm, BulkBudgetForm
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse, QueryDict, HttpResponseBadRequest
+from django.http import HttpResponse, QueryDict, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django_htmx.http import HttpResponseClientRefresh, retarget, trigger_client_event
+from finman.profiling import span
 from datetime import datetime
-from django.db.models import Sum
-from .models import Category, Expense, Income, Budget
-import plotly.express as px
-import pandas as pd
+from django.db import transaction
+from .models import Category, Expense, Income, Budget, MonthlyCategoryTotal
+from .pagination import keyset_page
+from .budgets import budget_status, copy_budgets_forward, save_budgets
+from . import charts, exports, importers, rollups, trends
 
 @login_required
 def dashboard(request):
-    expenses = Expense.objects.filter(user=request.user) 
+    # Only the first page is rendered; the rest is pulled in by expense_page
+    expenses, next_cursor = keyset_page(
+        Expense.objects.filter(user=request.user).select_related('category')
+    )
     form = ExpenseForm(user=request.user) # Pass the user to the form
+    today = datetime.now()
     return render(request, 'tracker/dashboard.html', {
         'expenses': expenses,
-        'form': form
+        'next_cursor': next_cursor,
+        'form': form,
+        'statuses': budget_status(request.user, today.year, today.month),
+    })
+
+@login_required
+def expense_page(request):
+    # HTMX "load more" endpoint. Returns the next page of rows plus a new sentinel row.
+    cursor = request.GET.get('cursor')
+    expenses, next_cursor = keyset_page(
+        Expense.objects.filter(user=request.user).select_related('category'),
+        cursor=cursor,
+    )
+    return render(request, 'tracker/partials/expense_page.html', {
+        'expenses': expenses,
+        'next_cursor': next_cursor,
     })
 
 @login_required
@@ -27,9 +50,12 @@ def add_expense(request):
         if form.is_valid():
             expense = form.save(commit=False)
             expense.user = request.user
-            expense.save()
-            # Return just the HTML for the new row
-            return render(request, 'tracker/partials/expense_row.html', {'expense': expense})
+            with transaction.atomic():
+                expense.save()
+                rollups.add_expense(expense)
+            # Return just the HTML for the new row, and tell the budget summary to refresh
+            response = render(request, 'tracker/partials/expense_row.html', {'expense': expense})
+            return trigger_client_event(response, 'expenseSaved')
     
     # This part will handle form errors, re-rendering the form with error messages
     # The HTMX swap will replace the old form with this new one
@@ -40,7 +66,10 @@ def add_expense(request):
 def delete_expense(request, pk):
     expense = get_object_or_404(Expense, pk=pk, user=request.user)
     if request.method == 'DELETE':
-        expense.delete()
+        with transaction.atomic():
+            expense.delete()
+            rollups.remove_expense(expense)
+        return trigger_client_event(HttpResponse(''), 'expenseSaved')
     return HttpResponse('') # Return an empty response
 
 # tracker/views.py
@@ -60,11 +89,16 @@ def edit_expense(request, pk):
     elif request.method == 'PUT':
         # The PUT logic we wrote before is actually correct and can stay.
         data = QueryDict(request.body)
+        # Validating the form updates the instance, so keep the old values for the rollup
+        old = rollups.snapshot(expense)
         form = ExpenseForm(data, instance=expense, user=request.user)
         
         if form.is_valid():
-            form.save()
-            return render(request, 'tracker/partials/expense_row.html', {'expense': expense})
+            with transaction.atomic():
+                form.save()
+                rollups.change_expense(old, expense)
+            response = render(request, 'tracker/partials/expense_row.html', {'expense': expense})
+            return trigger_client_event(response, 'expenseSaved')
         else:
             print("Form errors:", form.errors)
             # You can decide how to handle errors here, for now, we'll assume valid data
@@ -77,7 +111,7 @@ def edit_expense(request, pk):
 
 @login_required
 def get_expense_row(request, pk):
-    expense = get_object_or_404(Expense, pk=pk, user=request.user)
+    expense = get_object_or_404(Expense.objects.select_related('category'), pk=pk, user=request.user)
     return render(request, 'tracker/partials/expense_row.html', {'expense': expense})
 
 @login_required
@@ -86,47 +120,19 @@ def analytics_view(request):
     year = int(request.GET.get('year', datetime.now().year))
     month = int(request.GET.get('month', datetime.now().month))
     
-    # Query the database (this part is unchanged)
-    expenses = Expense.objects.filter(
-        user=request.user, 
-        date__year=year, 
-        date__month=month
-    )
-    
-    # Aggregate data for the chart (this part is unchanged)
-    category_totals = expenses.values('category__name').annotate(total=Sum('amount')).order_by('-total')
-    
-    # --- Start of New Plotly Logic ---
-    chart_html = ""
-    if category_totals:
-        # Convert the queryset to a Pandas DataFrame
-        df = pd.DataFrame(list(category_totals))
-        
-        # Rename columns for clarity in the chart
-        df.rename(columns={'category__name': 'Category', 'total': 'Amount'}, inplace=True)
-
-        # Create the Plotly Express pie chart
-        fig = px.pie(
-            df, 
-            names='Category', 
-            values='Amount',
-            title=f'Expenses for {datetime(year, month, 1).strftime("%B %Y")}',
-            height=400
-        )
-        
-        # Update layout for better appearance
-        fig.update_layout(
-            margin=dict(l=20, r=20, t=40, b=20),
-            legend_title_text='Categories'
-        )
-        
-        # Convert the figure to HTML
-        chart_html = fig.to_html(full_html=False, include_plotlyjs='cdn')
-    else:
-        # Provide a placeholder message if there's no data
-        chart_html = "<div class='text-center p-5'><p>No expense data for this period.</p></div>"
-    # --- End of New Plotly Logic ---
-
+    # Charts only change when the user's expenses for the month do, so serve them from the cache
+    chart_html = charts.get_cached_chart(request.user.id, year, month)
+    if chart_html is None:
+        # Read the pre-summed totals (one row per category) instead of scanning the month's expenses
+        category_totals = list(MonthlyCategoryTotal.objects.filter(
+            user=request.user,
+            year=year,
+            month=month,
+            count__gt=0,
+        ).values('category__name', 'total').order_by('-total'))
+        with span('chart'):
+            chart_html = charts.render_chart(category_totals, year, month)
+        charts.cache_chart(request.user.id, year, month, chart_html)
 
     context = {
         'chart_html': chart_html, # Renamed from chart_svg to chart_html
@@ -135,6 +141,8 @@ def analytics_view(request):
         # Generate lists for the filter dropdowns
         'years': range(datetime.now().year - 5, datetime.now().year + 1),
         'months': [(i, datetime(2000, i, 1).strftime('%B')) for i in range(1, 13)],
+        'trend_ranges': [(key, label) for key, (label, _) in trends.RANGES.items()],
+        'trend_range': trends.DEFAULT_RANGE,
     }
     
     # If this is an HTMX request, only return the chart partial
@@ -144,6 +152,26 @@ def analytics_view(request):
     # Otherwise, return the full page
     return render(request, 'tracker/analytics.html', context)
 
+@login_required
+def trends_view(request):
+    # Multi-month trends for the analytics page, always returned as a partial
+    range_key = request.GET.get('range', trends.DEFAULT_RANGE)
+    if range_key not in trends.RANGES:
+        return HttpResponseBadRequest("Unknown range.")
+
+    with span('trends'):
+        data = trends.trends_for(request.user, range_key)
+    with span('chart'):
+        chart_html = charts.render_trend_chart(data, trends.RANGES[range_key][0])
+
+    # Category table: one row per category with its monthly series
+    category_rows = [(name, series, sum(series)) for name, series in data['categories'].items()]
+    return render(request, 'tracker/partials/trends.html', {
+        'chart_html': chart_html,
+        'months': data['months'],
+        'category_rows': category_rows,
+    })
+
 @login_required
 def income_list(request):
     incomes = Income.objects.filter(user=request.user)
@@ -196,21 +224,101 @@ def manage_budgets(request):
                 defaults={'amount': amount}
             )
             # Return a partial that shows a success message
-            return render(request, 'tracker/partials/budget_success_indicator.html')
+            response = render(request, 'tracker/partials/budget_success_indicator.html')
+            return trigger_client_event(response, 'budgetSaved')
 
         except (ValueError, Category.DoesNotExist):
             return HttpResponseBadRequest("Invalid data provided.")
 
     # For a GET request, prepare the data for the main page
-    categories = Category.objects.filter(user=request.user)
-    budgets = Budget.objects.filter(user=request.user, year=current_year, month=current_month)
-    
-    # Create a dictionary for easy lookup in the template
-    budget_map = {budget.category.id: budget.amount for budget in budgets}
-    
     context = {
-        'categories': categories,
-        'budget_map': budget_map,
+        'statuses': budget_status(request.user, current_year, current_month),
         'current_month_name': datetime(current_year, current_month, 1).strftime('%B %Y')
     }
-    return render(request, 'tracker/manage_budgets.html', context)
\ No newline at end of file
+    return render(request, 'tracker/manage_budgets.html', context)
+
+@login_required
+@require_POST
+def save_all_budgets(request):
+    # Batch mode for the budgets page: every category's amount in one request
+    current_year = datetime.now().year
+    current_month = datetime.now().month
+
+    form = BulkBudgetForm(request.POST, categories=Category.objects.filter(user=request.user))
+    if not form.is_valid():
+        return render(request, 'tracker/partials/budget_errors.html', {'form': form})
+
+    save_budgets(request.user, current_year, current_month, form.amounts())
+    response = render(request, 'tracker/partials/budget_success_indicator.html')
+    return trigger_client_event(response, 'budgetSaved')
+
+@login_required
+@require_POST
+def copy_budgets(request):
+    # Start this month with last month's budgets, then reload the page to show them
+    copy_budgets_forward(request.user, datetime.now().year, datetime.now().month)
+    return HttpResponseClientRefresh()
+
+@login_required
+def budget_status_partial(request):
+    # Refreshed by HTMX whenever an expense or budget is saved
+    today = datetime.now()
+    try:
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+        datetime(year, month, 1)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid month.")
+    return render(request, 'tracker/partials/budget_status.html', {
+        'statuses': budget_status(request.user, year, month),
+        'year': year,
+        'month': month,
+    })
+
+
+def _export_response(name, fmt, columns, rows):
+    # Stream the file so memory stays flat however many rows the user has
+    response = StreamingHttpResponse(
+        exports.iter_export(fmt, columns, rows),
+        content_type=exports.CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+@login_required
+def export_expenses(request):
+    form = ExpenseExportForm(request.GET, user=request.user)
+    if not form.is_valid():
+        return HttpResponseBadRequest("Invalid export filters.")
+    data = form.cleaned_data
+    rows = exports.expense_rows(request.user, data['start'], data['end'], data['category'])
+    return _export_response('expenses', data['format'], exports.EXPENSE_COLUMNS, rows)
+
+@login_required
+def export_incomes(request):
+    form = IncomeExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest("Invalid export filters.")
+    data = form.cleaned_data
+    rows = exports.income_rows(request.user, data['start'], data['end'], data['source'])
+    return _export_response('incomes', data['format'], exports.INCOME_COLUMNS, rows)
+
+@login_required
+def import_expenses(request):
+    if request.method == 'POST':
+        form = ImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            parse = importers.parse_ofx if form.cleaned_data['format'] == 'ofx' else importers.parse_csv
+            with span('import'):
+                result = importers.import_expenses(request.user, parse(upload.file))
+            return render(request, 'tracker/partials/import_result.html', {
+                'result': result,
+                # Don't send back thousands of error lines
+                'errors': result.errors[:100],
+            })
+        # Show the errors in place of the form rather than in the result panel
+        response = render(request, 'tracker/partials/import_form.html', {'form': form})
+        return retarget(response, '#import-form-container')
+
+    return render(request, 'tracker/import.html', {'form': ImportForm()})